@@ -5,14 +5,24 @@
 Package manager for git repositories.
 
 Usage:
-    gitget install <package_url> [<package_name>] [options]
+    gitget install <package_url> [<package_name>] [--sparse=<path>]...
+                   [--tag=<tag>]... [--ref=<ref>] [--depth=<depth>] [options]
     gitget remove <package_name> [--soft] [options]
-    gitget update [options]
+    gitget update [--tag=<tag>]... [--match=<glob>] [--changed-since=<date>]
+                  [--scope=<scope>] [options]
     gitget move <package_name> <location> [options]
-    gitget list [options]
+    gitget list [--tag=<tag>]... [--match=<glob>] [--changed-since=<date>]
+                [--scope=<scope>] [options]
     gitget edit [options]
-    gitget doctor [options]
-    gitget setup [options]
+    gitget doctor [--tag=<tag>]... [--match=<glob>] [--changed-since=<date>]
+                  [--scope=<scope>] [options]
+    gitget setup [--project] [options]
+    gitget sparse <package_name> [<sparse_path>...] [--disable] [options]
+    gitget tag <package_name> [<tag_name>...] [--remove] [options]
+    gitget bundle export <directory> [--tag=<tag>]... [--match=<glob>]
+                  [--changed-since=<date>] [--scope=<scope>] [--full]
+                  [--jobs=<jobs>] [options]
+    gitget bundle import <directory> [<location>] [--jobs=<jobs>] [options]
     gitget help <command>
     gitget -h | --help
     gitget --version
@@ -21,6 +31,12 @@ Global options:
     --debug    Increases verbosity of the output
     --nocolor  Logs will not have colors in them
 
+Selection options:
+    --tag=<tag>             Only use packages with any of the tags
+    --match=<glob>          Only use packages with names matching the glob
+    --changed-since=<date>  Only use packages changed since the date
+    --scope=<scope>         Package files to use: project, user, system or all
+
 Examples:
     gitget setup
     gitget install awesmubarak/git-get
@@ -79,7 +95,9 @@ def main():
 
     # call the right command, based on the argument
     logger.debug("Calling the function based on the command sent")
-    if arguments["doctor"]:
+    if arguments["bundle"]:
+        commands.bundle.Bundle(arguments).run()
+    elif arguments["doctor"]:
         commands.doctor.Doctor(arguments).run()
     elif arguments["edit"]:
         commands.edit.Edit(arguments).run()
@@ -95,6 +113,10 @@ def main():
         commands.remove.Remove(arguments).run()
     elif arguments["setup"]:
         commands.setup.Setup(arguments).run()
+    elif arguments["sparse"]:
+        commands.sparse.Sparse(arguments).run()
+    elif arguments["tag"]:
+        commands.tag.Tag(arguments).run()
     elif arguments["update"]:
         commands.update.Update(arguments).run()
 
@@ -1,3 +1,4 @@
+from .bundle import *
 from .doctor import *
 from .edit import *
 from .help import *
@@ -6,4 +7,6 @@ from .list import *
 from .move import *
 from .remove import *
 from .setup import *
+from .sparse import *
+from .tag import *
 from .update import *
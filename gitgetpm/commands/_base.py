@@ -1,6 +1,13 @@
-from os import path
+from datetime import date, datetime
+from os import getcwd, path
 from loguru import logger
-import yaml
+from ._packagefile import PackageFile
+import fnmatch
+import git
+
+PACKAGE_FILE_NAME = ".gitget.yaml"
+SYSTEM_PACKAGE_FILE_PATH = "/etc/gitget.yaml"
+SCOPES = ("project", "user", "system", "all")
 
 
 class Base(object):
@@ -10,83 +17,213 @@ class Base(object):
         self.options = options
         self.args = args
         self.kwargs = kwargs
+        self._package_files = None
 
     def run(self):
         pass
 
+    def get_user_package_list_filepath(*args, **kwargs):
+        """Returns the filepath of the package file in the home directory."""
+        user = path.expanduser("~")
+        return f"{user}/{PACKAGE_FILE_NAME}"
+
+    def get_project_package_list_filepath(*args, **kwargs):
+        """Returns the filepath of the project's package file, if there is one.
+
+        The project's package file is the closest `.gitget.yaml` found by
+        walking up from the current directory, stopping at the home directory.
+        """
+        logger.debug("Looking for a project package file")
+        user = path.expanduser("~")
+        directory = getcwd()
+        while directory != user:
+            filepath = path.join(directory, PACKAGE_FILE_NAME)
+            if path.isfile(filepath):
+                logger.debug(f"Project package file found: {filepath}")
+                return filepath
+            parent_directory = path.dirname(directory)
+            if parent_directory == directory:
+                break
+            directory = parent_directory
+        logger.debug("No project package file found")
+        return None
+
     def get_package_list_filepath(*args, **kwargs):
-        """Returns the filepath of the file containing the package info."""
+        """Returns the filepath of the file containing the package info.
+
+        This is the project's package file if there is one, otherwise the one in
+        the home directory.
+        """
         logger.debug("Getting the package file filepath")
-        user = path.expanduser("~")
-        filepath = f"{user}/.gitget.yaml"
+        filepath = Base.get_project_package_list_filepath()
+        if filepath is None:
+            filepath = Base.get_user_package_list_filepath()
         logger.debug("Filepath found")
         return filepath
 
-    @staticmethod
-    def check_package_list_file(package_list_path, *args, **kwargs):
-        """Verifies the package list file exists.
+    def get_package_files(self, *args, **kwargs):
+        """Returns the package files, from the most to the least specific.
 
-        Returns (int):
-            0: valid
-            1: not found
-            2: a folder instead of a file
+        The files aren't read until their packages are used.
         """
-        logger.debug("Checking file status")
-        path_exists = path.exists(package_list_path)
-        path_is_dir = path.isdir(package_list_path)
-
-        logger.debug("File status found, returning value")
-        if not path_exists:
-            return 1
-        elif path_exists and path_is_dir:
-            return 2
-        else:
-            return 3
-
-    def get_package_list(*args):
-        """Returns the extracted yaml data from the package file."""
-        logger.debug("Loading package list")
-        package_list_filepath = Base.get_package_list_filepath()
-
-        # check package list file is valid
-        logger.debug("Checking filepath")
-        package_list_file_valid = Base.check_package_list_file(package_list_filepath)
-        if package_list_file_valid == 1:
-            logger.error("Package file missing, please run `gitget setup`")
-            exit(1)
-        elif package_list_file_valid == 2:
-            logger.error(
-                "Package file is a directory, please remove `.gitget.yaml` and run `gitget setup`"
+        if self._package_files is not None:
+            return self._package_files
+        package_files = []
+        project_filepath = Base.get_project_package_list_filepath()
+        if project_filepath is not None:
+            package_files.append(PackageFile(project_filepath, "project"))
+        package_files.append(
+            PackageFile(Base.get_user_package_list_filepath(), "user")
+        )
+        if path.isfile(SYSTEM_PACKAGE_FILE_PATH):
+            package_files.append(
+                PackageFile(SYSTEM_PACKAGE_FILE_PATH, "system", read_only=True)
             )
+        self._package_files = package_files
+        return package_files
+
+    def get_package_file(self, *args, **kwargs):
+        """Returns the package file new packages are saved to."""
+        return self.get_package_files()[0]
+
+    def get_scoped_package_files(self, *args, **kwargs):
+        """Returns the package files chosen by the `--scope` option.
+
+        Without the option only the closest package file is used.
+        """
+        scope = self.options.get("--scope")
+        package_files = self.get_package_files()
+        if scope is None:
+            return package_files[:1]
+        elif scope == "all":
+            return [file for file in package_files if file.exists()]
+        elif scope not in SCOPES:
+            logger.error(f"Not a valid scope: {scope}")
             exit(1)
-        elif package_list_file_valid == 0:
-            logger.debug("Package file found")
 
-        # try loading the file
-        logger.debug("Attempting to load file")
-        try:
-            with open(package_list_filepath) as file:
-                package_list = yaml.safe_load(file)
-        except Exception as ex:
-            logger.error("Could not load package list due to the following error:")
-            logger.error(ex)
+        package_files = [file for file in package_files if file.scope == scope]
+        if not package_files:
+            logger.error(f"No {scope} package file found")
             exit(1)
-        logger.debug("Package list loaded")
-
-        # if the list is NONE, set to an empty dictionary to prevent iteration errors
-        logger.debug("Checking if package list is None")
-        if package_list is None:
-            package_list = {}
-            logger.debug("Package list has no content, set to empty dict")
-        return package_list
-
-    def write_package_list(_, package_list, *args):
-        """Writes the package information to the package file."""
-        logger.debug("Attempting to write package list")
+        return package_files
+
+    def get_package(self, package_name, writable=False, *args, **kwargs):
+        """Returns the package file and information for a package.
+
+        Package files are checked from the most to the least specific, and the
+        ones after the package is found are never read. If `writable` is set,
+        packages in read only package files are rejected.
+        """
+        logger.debug("Checking if package in package list")
+        for package_file in self.get_package_files():
+            if package_file.exists() and package_name in package_file.packages:
+                logger.debug(f"Package in {package_file.scope} package file")
+                if writable and package_file.read_only:
+                    logger.error(
+                        f"Package is in the {package_file.scope} package file, which can not be changed"
+                    )
+                    exit(1)
+                return package_file, package_file.packages[package_name]
+        logger.error("Package name not in package list")
+        exit(1)
+
+    @staticmethod
+    def apply_sparse_checkout(package_location, sparse_paths, *args, **kwargs):
+        """Sets the sparse-checkout paths (cone mode) of a package.
+
+        An empty list of paths disables sparse-checkout, restoring the full
+        working tree.
+        """
+        repo = git.Repo(package_location)
+        if sparse_paths:
+            logger.debug(f"Setting sparse paths: {', '.join(sparse_paths)}")
+            repo.git.sparse_checkout("init", "--cone")
+            repo.git.sparse_checkout("set", *sparse_paths)
+        else:
+            logger.debug("Disabling sparse-checkout")
+            repo.git.sparse_checkout("disable")
+
+    @staticmethod
+    def parse_time(value, *args, **kwargs):
+        """Returns a date, datetime or ISO 8601 string as a local datetime.
+
+        Times with a timezone are converted to local time, so they can be
+        compared with the times gitget saves. Raises ValueError for anything
+        else.
+        """
+        if isinstance(value, str):
+            value = datetime.fromisoformat(value)
+        elif isinstance(value, date) and not isinstance(value, datetime):
+            value = datetime(value.year, value.month, value.day)
+        elif not isinstance(value, datetime):
+            raise ValueError(f"Not a valid date: {value}")
+        if value.tzinfo is not None:
+            value = value.astimezone().replace(tzinfo=None)
+        return value
+
+    def is_changed_since(self, package_name, package_info, since, *args, **kwargs):
+        """Returns whether a package last changed at or after the time."""
+        if not package_info["updated"]:
+            return False
         try:
-            with open(Base.get_package_list_filepath(), "w") as file:
-                yaml.dump(package_list, file, sort_keys=True)
-        except:
-            logger.exception("Could not write package list")
-            exit(1)
-        logger.debug("Packages written to file")
+            return self.parse_time(package_info["updated"]) >= since
+        except ValueError:
+            logger.warning(
+                f"Package {package_name} has an invalid updated time: {package_info['updated']}"
+            )
+            return False
+
+    def select_packages(self, *args, **kwargs):
+        """Returns the packages chosen by the scope and selection options.
+
+        Each package is returned as `(package_name, package_file)`. `--tag`
+        uses the tag index, `--match` only looks at package names, and
+        `--changed-since` compares the time each package last changed. A
+        package in a more specific package file hides any package with the same
+        name in the files after it.
+        """
+        tags = self.options.get("--tag") or []
+        match = self.options.get("--match")
+        changed_since = self.options.get("--changed-since")
+
+        since = None
+        if changed_since:
+            try:
+                since = self.parse_time(changed_since)
+            except ValueError:
+                logger.error(f"Not a valid date: {changed_since}")
+                exit(1)
+
+        logger.debug("Selecting packages")
+        selected_packages = []
+        hidden_names = set()
+        for package_file in self.get_scoped_package_files():
+            package_list = package_file.packages
+
+            if tags:
+                package_names = set()
+                for tag in tags:
+                    package_names.update(package_file.tags.get(tag, []))
+                package_names &= package_list.keys()
+            else:
+                package_names = set(package_list)
+            package_names -= hidden_names
+
+            if match:
+                package_names = set(fnmatch.filter(package_names, match))
+
+            if since is not None:
+                package_names = {
+                    package_name
+                    for package_name in package_names
+                    if self.is_changed_since(
+                        package_name, package_list[package_name], since
+                    )
+                }
+
+            selected_packages += [
+                (package_name, package_file) for package_name in package_names
+            ]
+            hidden_names.update(package_list)
+        logger.debug(f"Selected {len(selected_packages)} packages")
+        return sorted(selected_packages, key=lambda package: package[0])
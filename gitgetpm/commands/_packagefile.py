@@ -0,0 +1,210 @@
+from os import path
+from loguru import logger
+import yaml
+
+PACKAGE_FILE_VERSION = 2
+
+
+class PackageFile(object):
+    """A package file, which saves the information about a set of packages.
+
+    The file is only read the first time its packages or tags are used, so
+    package files that a command doesn't need are never parsed.
+    """
+
+    def __init__(self, filepath, scope, read_only=False, *args, **kwargs):
+        self.filepath = filepath
+        self.scope = scope
+        self.read_only = read_only
+        self.tags_rebuilt = False
+        self._data = None
+
+    @property
+    def packages(self):
+        """The information for each package in the file."""
+        return self.load()["packages"]
+
+    @property
+    def tags(self):
+        """The tag index, mapping each tag to the names of its packages."""
+        return self.load()["tags"]
+
+    @staticmethod
+    def check_package_list_file(package_list_path, *args, **kwargs):
+        """Verifies the package list file exists.
+
+        Returns (int):
+            0: valid
+            1: not found
+            2: a folder instead of a file
+        """
+        logger.debug("Checking file status")
+        path_exists = path.exists(package_list_path)
+        path_is_dir = path.isdir(package_list_path)
+
+        logger.debug("File status found, returning value")
+        if not path_exists:
+            return 1
+        elif path_exists and path_is_dir:
+            return 2
+        else:
+            return 3
+
+    @staticmethod
+    def new_package_info(
+        path,
+        url=None,
+        tags=None,
+        ref=None,
+        clone_options=None,
+        sparse=None,
+        updated=None,
+        exported=None,
+        *args,
+        **kwargs,
+    ):
+        """Returns the package list entry for a package, with all fields set.
+
+        `exported` maps each branch, tag and HEAD to what it pointed at when
+        the package was last exported, so the next export only contains what
+        changed. Older package files only saved a list of commits, which is
+        dropped so the next export is a full one.
+        """
+        return {
+            "path": path,
+            "url": url,
+            "tags": list(tags or []),
+            "ref": ref,
+            "clone_options": dict(clone_options or {}),
+            "sparse": list(sparse or []),
+            "updated": updated,
+            "exported": dict(exported) if isinstance(exported, dict) else {},
+        }
+
+    @staticmethod
+    def build_tag_index(package_list, *args, **kwargs):
+        """Returns the tag index for the packages.
+
+        The tag index maps each tag to the names of the packages with that tag,
+        so packages can be selected by tag without checking every package.
+        """
+        tag_index = {}
+        for package_name in sorted(package_list):
+            for tag in package_list[package_name]["tags"]:
+                tag_index.setdefault(tag, []).append(package_name)
+        return tag_index
+
+    @staticmethod
+    def normalize_package_list(package_list, filepath, *args, **kwargs):
+        """Returns the packages with all fields set.
+
+        Entries can be just a path, as in the old flat format or when edited by
+        hand, or a dict missing fields added since the package was saved.
+        """
+        normalized_package_list = {}
+        for package_name, package_info in (package_list or {}).items():
+            if not isinstance(package_info, dict):
+                package_info = {"path": package_info}
+            if not package_info.get("path"):
+                logger.error(f"Package {package_name} has no path in {filepath}")
+                exit(1)
+            normalized_package_list[package_name] = PackageFile.new_package_info(
+                **package_info
+            )
+        return normalized_package_list
+
+    @staticmethod
+    def migrate_package_file(package_file, filepath, *args, **kwargs):
+        """Converts a flat `name: path` package file to the current format."""
+        logger.debug("Migrating package file")
+        package_list = PackageFile.normalize_package_list(package_file, filepath)
+        return {
+            "version": PACKAGE_FILE_VERSION,
+            "packages": package_list,
+            "tags": PackageFile.build_tag_index(package_list),
+        }
+
+    def exists(self):
+        """Returns whether the package file exists."""
+        return self.check_package_list_file(self.filepath) == 3
+
+    def load(self):
+        """Returns the extracted yaml data from the package file.
+
+        Package files in the old flat format are migrated and saved first.
+        """
+        if self._data is not None:
+            return self._data
+        logger.debug(f"Loading package file {self.filepath}")
+
+        # check package list file is valid
+        logger.debug("Checking filepath")
+        package_list_file_valid = self.check_package_list_file(self.filepath)
+        if package_list_file_valid == 1:
+            logger.error(
+                f"Package file missing, please run `gitget setup`: {self.filepath}"
+            )
+            exit(1)
+        elif package_list_file_valid == 2:
+            logger.error(
+                f"Package file is a directory, please remove it and run `gitget setup`: {self.filepath}"
+            )
+            exit(1)
+
+        # try loading the file
+        logger.debug("Attempting to load file")
+        try:
+            with open(self.filepath) as file:
+                package_list = yaml.safe_load(file)
+        except Exception as ex:
+            logger.error("Could not load package list due to the following error:")
+            logger.error(ex)
+            exit(1)
+        logger.debug("Package list loaded")
+
+        # if the list is NONE, set to an empty dictionary to prevent iteration errors
+        logger.debug("Checking if package list is None")
+        if package_list is None:
+            package_list = {}
+            logger.debug("Package list has no content, set to empty dict")
+
+        # migrate package files from before packages had more information
+        logger.debug("Checking the package file version")
+        if "version" not in package_list or "packages" not in package_list:
+            self._data = self.migrate_package_file(package_list, self.filepath)
+            if package_list and not self.read_only:
+                self.write()
+                logger.info(f"Migrated package file to the new format: {self.filepath}")
+        elif package_list["version"] > PACKAGE_FILE_VERSION:
+            logger.error(
+                f"Package file is from a newer version of gitget: {self.filepath}"
+            )
+            exit(1)
+        else:
+            package_list["packages"] = self.normalize_package_list(
+                package_list["packages"], self.filepath
+            )
+            # rebuild the tag index, which is out of date if the tags were
+            # changed or the index removed by hand
+            tag_index = self.build_tag_index(package_list["packages"])
+            if package_list.get("tags") != tag_index:
+                logger.debug("Tag index out of date, rebuilding it")
+                package_list["tags"] = tag_index
+                self.tags_rebuilt = True
+            self._data = package_list
+        return self._data
+
+    def write(self):
+        """Writes the package information to the package file."""
+        logger.debug(f"Attempting to write package file {self.filepath}")
+        if self.read_only:
+            logger.error(f"The {self.scope} package file can not be changed")
+            exit(1)
+        self._data["tags"] = self.build_tag_index(self._data["packages"])
+        try:
+            with open(self.filepath, "w") as file:
+                yaml.dump(self._data, file, sort_keys=True)
+        except:
+            logger.exception("Could not write package list")
+            exit(1)
+        logger.debug("Packages written to file")
@@ -0,0 +1,476 @@
+from ._base import Base
+from ._packagefile import PackageFile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from loguru import logger
+from os import cpu_count, getcwd, listdir, makedirs, path, rmdir
+from shutil import rmtree
+from urllib.parse import quote
+import git
+import yaml
+
+MANIFEST_NAME = "manifest.yaml"
+
+
+class Bundle(Base):
+    """Bundle.
+
+    Copies packages to machines without network access. `export` writes a git
+    bundle for each package to a new folder in the directory, along with a
+    manifest describing them. Only the branches and tags that changed since the
+    last export are included, unless `--full` is passed. Shallow clones can't
+    be exported. `import` applies every export in the directory that wasn't
+    imported yet from oldest to newest, updating installed packages and
+    installing new ones.
+
+    Usage:
+        gitget bundle export <directory> [options] [global options]
+        gitget bundle import <directory> [<location>] [options] [global options]
+
+    Options:
+        --full                  Export every object, not only the new ones
+        --jobs=<jobs>           Number of packages to export or import at once
+        --tag=<tag>             Only export packages with the tag, can be
+                                repeated to export packages with any of the tags
+        --match=<glob>          Only export packages with names matching the glob
+        --changed-since=<date>  Only export packages changed since the date
+        --scope=<scope>         Package files to export from: project, user,
+                                system or all (the closest package file by
+                                default)
+
+    Examples:
+        gitget bundle export /media/usb/gitget
+        gitget bundle export /media/usb/gitget --tag tools --full
+        gitget bundle import /media/usb/gitget ~/packages
+    """
+
+    def run(self):
+        directory = path.abspath(self.options["<directory>"])
+
+        # decide how many packages to work on at once
+        logger.debug("Deciding number of jobs")
+        jobs = self.options.get("--jobs")
+        if jobs is None:
+            jobs = cpu_count() or 1
+        else:
+            try:
+                jobs = int(jobs)
+            except ValueError:
+                logger.error(f"Number of jobs is not a number: {jobs}")
+                exit(1)
+            if jobs < 1:
+                logger.error("Number of jobs must be at least 1")
+                exit(1)
+
+        if self.options["export"]:
+            self.export_bundles(directory, jobs)
+        elif self.options["import"]:
+            self.import_bundles(directory, jobs)
+
+    def export_bundles(self, directory, jobs):
+        """Exports the selected packages to bundles in the directory."""
+        full = self.options.get("--full")
+        selected_packages = self.select_packages()
+
+        logger.debug("Making sure there are some packages to export")
+        if not selected_packages:
+            logger.info("No packages to export")
+            exit(0)
+
+        # each export gets its own folder, so exports that haven't been
+        # imported yet aren't overwritten
+        logger.debug("Creating the export directory")
+        created = datetime.now()
+        export_name = f"export-{created.strftime('%Y%m%d-%H%M%S')}"
+        export_directory = path.join(directory, export_name)
+        number = 1
+        while path.exists(export_directory):
+            export_directory = path.join(directory, f"{export_name}-{number}")
+            number += 1
+        try:
+            makedirs(export_directory)
+        except OSError:
+            logger.exception(f"Could not create the directory: {export_directory}")
+            exit(1)
+
+        # export the packages, saving what was exported
+        logger.info(f"Exporting {len(selected_packages)} packages")
+        manifest = {
+            "created": created.isoformat(timespec="seconds"),
+            "packages": {},
+        }
+        changed_package_files = []
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            futures = {
+                executor.submit(
+                    self.export_package,
+                    package_name,
+                    package_file.packages[package_name],
+                    export_directory,
+                    full,
+                ): (package_name, package_file)
+                for package_name, package_file in selected_packages
+            }
+            for future in as_completed(futures):
+                package_name, package_file = futures[future]
+                try:
+                    manifest_entry, exported = future.result()
+                except ValueError as ex:
+                    logger.error(f"Package {package_name} could not be exported: {ex}")
+                    continue
+                except Exception:
+                    logger.exception(f"Package {package_name} could not be exported")
+                    continue
+                if manifest_entry is None:
+                    logger.info(f"Package {package_name} has nothing new to export")
+                    continue
+                logger.info(f"Exported {package_name}")
+
+                manifest["packages"][package_name] = manifest_entry
+                package_file.packages[package_name]["exported"] = exported
+                if (
+                    not package_file.read_only
+                    and package_file not in changed_package_files
+                ):
+                    changed_package_files.append(package_file)
+
+        # write the manifest, leaving nothing behind if nothing was exported
+        if not manifest["packages"]:
+            rmdir(export_directory)
+            logger.info("No packages were exported")
+            return 0
+        logger.debug("Writing the manifest")
+        try:
+            with open(path.join(export_directory, MANIFEST_NAME), "w") as file:
+                yaml.dump(manifest, file, sort_keys=True)
+        except:
+            logger.exception("Could not write the manifest")
+            exit(1)
+        logger.info(
+            f"Exported {len(manifest['packages'])} packages to {export_directory}"
+        )
+
+        # save each package file once
+        for package_file in changed_package_files:
+            package_file.write()
+        if changed_package_files:
+            logger.info("Saved package information")
+
+    @staticmethod
+    def get_refs(repo):
+        """Returns what each branch, tag and HEAD of a repository points at."""
+        refs = {"HEAD": repo.head.commit.hexsha}
+        output = repo.git.for_each_ref(
+            "--format=%(objectname) %(refname)", "refs/heads", "refs/tags"
+        )
+        for line in output.splitlines():
+            object_name, ref = line.split(" ", 1)
+            refs[ref] = object_name
+        return refs
+
+    @staticmethod
+    def is_ancestor(repo, ancestor, commit):
+        """Returns whether a commit is, or is an ancestor of, another commit."""
+        try:
+            repo.git.merge_base("--is-ancestor", ancestor, commit)
+        except git.GitCommandError:
+            return False
+        return True
+
+    @staticmethod
+    def export_package(package_name, package_info, directory, full):
+        """Writes the bundle for a package.
+
+        Returns the package's manifest entry and the refs the export ended at,
+        or None for both if no branch or tag changed since the last export.
+        Shallow clones are refused, as their bundles can't be imported.
+        """
+        logger.debug(f"Attempting to export {package_name}")
+        repo = git.Repo(package_info["path"])
+
+        if repo.git.rev_parse("--is-shallow-repository") == "true":
+            raise ValueError(
+                "Package is a shallow clone, run `git fetch --unshallow` in "
+                f"{package_info['path']} before exporting it"
+            )
+
+        # note every branch, tag and HEAD, the bundle only has the ones that
+        # changed but the target will have them all
+        exported = Bundle.get_refs(repo)
+        previous_exported = {} if full else package_info["exported"]
+        if previous_exported and exported == previous_exported:
+            return None, None
+
+        # only refs that changed are bundled, leaving out everything the last
+        # export already had
+        if previous_exported:
+            revisions = [
+                ref
+                for ref, object_name in exported.items()
+                if previous_exported.get(ref) != object_name
+            ]
+            # refs that were only removed leave nothing to bundle
+            if not revisions:
+                return None, None
+            tips = []
+            for ref in revisions:
+                try:
+                    tips.append(
+                        repo.git.rev_parse("--verify", "--quiet", f"{ref}^{{commit}}")
+                    )
+                except git.GitCommandError:
+                    logger.debug(f"Ref {ref} does not point at a commit")
+
+            # skip commits that no longer exist
+            prerequisites = set()
+            for object_name in previous_exported.values():
+                try:
+                    prerequisites.add(
+                        repo.git.rev_parse(
+                            "--verify", "--quiet", f"{object_name}^{{commit}}"
+                        )
+                    )
+                except git.GitCommandError:
+                    logger.debug(f"Commit {object_name} no longer exists")
+
+            # git leaves refs the prerequisites already have out of the bundle,
+            # so leave out the parents of those refs instead, which the target
+            # has too
+            prerequisites_changed = True
+            while prerequisites_changed:
+                prerequisites_changed = False
+                for tip in tips:
+                    for commit in sorted(prerequisites):
+                        if Bundle.is_ancestor(repo, tip, commit):
+                            prerequisites.remove(commit)
+                            prerequisites.update(repo.git.rev_parse(f"{tip}^@").split())
+                            prerequisites_changed = True
+            prerequisites = sorted(prerequisites)
+            revisions += [f"^{commit}" for commit in prerequisites]
+        else:
+            revisions = ["--branches", "--tags", "HEAD"]
+            prerequisites = []
+
+        # write the bundle, quoting the name so different names can't clash
+        bundle_name = f"{quote(package_name, safe='')}.bundle"
+        bundle_path = path.join(directory, bundle_name)
+        repo.git.bundle("create", bundle_path, *revisions)
+
+        # note which commits the bundle ends at
+        heads = {}
+        for line in repo.git.bundle("list-heads", bundle_path).splitlines():
+            commit, ref = line.split(" ", 1)
+            heads[ref] = commit
+
+        # packages saved before URLs were saved use the URL of their origin
+        url = package_info["url"]
+        if url is None and "origin" in repo.remotes:
+            url = repo.remotes.origin.url
+
+        manifest_entry = {
+            "bundle": bundle_name,
+            "full": not previous_exported,
+            "prerequisites": prerequisites,
+            "heads": heads,
+            "directory": path.basename(package_info["path"]),
+            "url": url,
+            "tags": package_info["tags"],
+            "ref": package_info["ref"],
+            "clone_options": package_info["clone_options"],
+            "sparse": package_info["sparse"],
+        }
+        return manifest_entry, exported
+
+    def import_bundles(self, directory, jobs):
+        """Imports every export in the directory, saving the packages once."""
+        location = path.abspath(self.options["<location>"] or getcwd())
+
+        # the directory can be a single export, or hold many exports
+        logger.debug("Finding exports")
+        if path.isfile(path.join(directory, MANIFEST_NAME)):
+            export_directories = [directory]
+        else:
+            try:
+                export_directories = [
+                    path.join(directory, name)
+                    for name in sorted(listdir(directory))
+                    if path.isfile(path.join(directory, name, MANIFEST_NAME))
+                ]
+            except OSError:
+                logger.exception(f"Could not read the directory: {directory}")
+                exit(1)
+        if not export_directories:
+            logger.error(f"No exports found in {directory}")
+            exit(1)
+
+        package_file = self.get_package_file()
+        package_list = package_file.packages
+        imported = list(package_file.load().get("imported") or [])
+
+        # import the exports in the order they were made, skipping the ones
+        # already applied, then save the packages once
+        package_list_changed = False
+        for export_directory in export_directories:
+            export_name = path.basename(export_directory)
+            if export_name in imported:
+                logger.info(f"Export {export_name} was already imported")
+                continue
+            changed, applied = self.import_export(
+                export_directory, location, package_list, jobs
+            )
+            if changed:
+                package_list_changed = True
+            # exports with packages that failed are applied again next time
+            if applied:
+                imported.append(export_name)
+                package_file.load()["imported"] = imported
+                package_list_changed = True
+
+        if package_list_changed:
+            package_file.write()
+            logger.info("Saved package information")
+
+    def import_export(self, directory, location, package_list, jobs):
+        """Imports the bundles of one export into the package list.
+
+        Returns whether the package list changed, and whether every package
+        was imported.
+        """
+        logger.debug(f"Loading the manifest in {directory}")
+        try:
+            with open(path.join(directory, MANIFEST_NAME)) as file:
+                manifest = yaml.safe_load(file)
+        except Exception as ex:
+            logger.error("Could not load the manifest due to the following error:")
+            logger.error(ex)
+            exit(1)
+        manifest_packages = (manifest or {}).get("packages") or {}
+
+        logger.debug("Making sure there are some packages to import")
+        if not manifest_packages:
+            logger.info(f"No packages to import from {directory}")
+            return False, True
+
+        # new packages that would be cloned to the same directory are skipped
+        logger.debug("Checking new package locations")
+        package_locations = {}
+        applied = True
+        for package_name, manifest_entry in sorted(manifest_packages.items()):
+            if package_name in package_list:
+                continue
+            package_location = path.join(location, manifest_entry["directory"])
+            if package_location in package_locations.values():
+                logger.error(
+                    f"Package {package_name} could not be imported, another package is being imported to {package_location}"
+                )
+                applied = False
+                continue
+            package_locations[package_name] = package_location
+
+        logger.info(f"Importing {len(manifest_packages)} packages from {directory}")
+        package_list_changed = False
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            futures = {
+                executor.submit(
+                    self.import_package,
+                    package_name,
+                    manifest_entry,
+                    directory,
+                    package_locations.get(package_name),
+                    package_list.get(package_name),
+                ): package_name
+                for package_name, manifest_entry in manifest_packages.items()
+                if package_name in package_list or package_name in package_locations
+            }
+            for future in as_completed(futures):
+                package_name = futures[future]
+                try:
+                    package_info = future.result()
+                except ValueError as ex:
+                    logger.error(f"Package {package_name} could not be imported: {ex}")
+                    applied = False
+                    continue
+                except Exception:
+                    logger.exception(f"Package {package_name} could not be imported")
+                    applied = False
+                    continue
+                if package_info is None:
+                    logger.info(f"Package {package_name} checkout didn't change")
+                    continue
+                logger.info(f"Imported {package_name}")
+
+                package_info["updated"] = datetime.now().isoformat(timespec="seconds")
+                package_list[package_name] = package_info
+                package_list_changed = True
+        return package_list_changed, applied
+
+    @staticmethod
+    def import_package(
+        package_name, manifest_entry, directory, package_location, package_info
+    ):
+        """Applies the bundle for a package and returns its package information.
+
+        Installed packages are fast-forwarded, and None is returned if they
+        didn't change. Packages that aren't installed are cloned from the
+        bundle, which needs to be from a full export.
+        """
+        logger.debug(f"Attempting to import {package_name}")
+        bundle_path = path.join(directory, manifest_entry["bundle"])
+        ref = manifest_entry["ref"]
+
+        if package_info is not None:
+            repo = git.Repo(package_info["path"])
+            previous_commit = repo.head.commit.hexsha
+            repo.git.bundle("verify", bundle_path)
+            repo.git.fetch(
+                bundle_path,
+                "+refs/heads/*:refs/remotes/origin/*",
+                "+refs/tags/*:refs/tags/*",
+            )
+            if package_info["ref"] is not None:
+                repo.git.checkout(package_info["ref"])
+            if not repo.head.is_detached:
+                branch = repo.active_branch.name
+                if f"origin/{branch}" in repo.refs:
+                    repo.git.merge("--ff-only", f"origin/{branch}")
+            if repo.head.commit.hexsha == previous_commit:
+                return None
+            return package_info
+
+        if not manifest_entry.get("full", not manifest_entry["prerequisites"]):
+            raise ValueError(
+                "Package is not installed and the bundle only has new objects, "
+                "import a full export (`gitget bundle export --full`) first"
+            )
+        if path.isdir(package_location):
+            raise ValueError(f"Directory already exists: {package_location}")
+
+        # sparse packages only check out the top level until their paths are
+        # set, other packages aren't checked out until the ref is
+        clone_options = dict(manifest_entry["clone_options"])
+        if manifest_entry["sparse"]:
+            clone_options["sparse"] = True
+        else:
+            clone_options["no_checkout"] = True
+        repo = git.Repo.clone_from(bundle_path, package_location, **clone_options)
+        try:
+            if manifest_entry["url"] is not None:
+                repo.remotes.origin.set_url(manifest_entry["url"])
+            if manifest_entry["sparse"]:
+                Base.apply_sparse_checkout(package_location, manifest_entry["sparse"])
+            if ref is not None:
+                repo.git.checkout(ref)
+            else:
+                repo.git.checkout()
+        except:
+            rmtree(package_location, ignore_errors=True)
+            raise
+
+        return PackageFile.new_package_info(
+            path=package_location,
+            url=manifest_entry["url"],
+            tags=manifest_entry["tags"],
+            ref=ref,
+            clone_options=manifest_entry["clone_options"],
+            sparse=manifest_entry["sparse"],
+        )
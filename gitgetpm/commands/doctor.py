@@ -8,17 +8,26 @@ class Doctor(Base):
     Verifies integrity of files and packages. Any errors are then reported
     and need to be fixed.
 
-    Usage: gitget doctor [global options]
+    Usage: gitget doctor [options] [global options]
+
+    Options:
+        --tag=<tag>             Only check packages with the tag, can be
+                                repeated to check packages with any of the tags
+        --match=<glob>          Only check packages with names matching the glob
+        --changed-since=<date>  Only check packages changed since the date
+        --scope=<scope>         Package files to use: project, user, system or
+                                all (the closest package file by default)
 
     Examples:
         gitget doctor
+        gitget doctor --match 'awesmubarak_*'
     """
 
     def run(self):
         # Core modules required in this script
         try:
             from loguru import logger
-            from yaml import safe_load
+            from yaml import safe_load, YAMLError
             from os import path
         except ModuleNotFoundError as ex:
             logger.error(f"Could not import one or more modules: {ex}")
@@ -37,27 +46,41 @@ class Doctor(Base):
                 f"Could not import the following modules: {failed_modules_str}"
             )
 
-        # Check if package file exists
-        logger.debug("Checking if package file exists")
-        package_list_path = self.get_package_list_filepath()  # checks automaticcaly
-        logger.info("Package file found")
+        for package_file in self.get_scoped_package_files():
+            # Check if package file exists
+            logger.debug(f"Checking if {package_file.scope} package file exists")
+            if not package_file.exists():
+                logger.error(f"The {package_file.scope} package file was not found")
+                exit(1)
+            logger.info(f"The {package_file.scope} package file was found")
 
-        # Verify that the file is valid yaml
-        logger.debug("Verifying that the package file is valid yaml")
-        try:
-            with open(package_list_path) as file:
-                package_list = safe_load(file)
-            logger.info("File is valid yaml")
-        except ValueError as e:
-            logger.error("Package file is invalid yaml")
-            exit(1)
+            # Verify that the file is valid yaml
+            logger.debug("Verifying that the package file is valid yaml")
+            try:
+                with open(package_file.filepath) as file:
+                    safe_load(file)
+                logger.info("File is valid yaml")
+            except YAMLError as e:
+                logger.error("Package file is invalid yaml")
+                exit(1)
+
+            # Check that the tag index matches the tags of each package, it can
+            # be out of date if the package file was edited by hand
+            logger.debug("Checking the tag index")
+            package_file.load()
+            if not package_file.tags_rebuilt:
+                logger.info("Tag index is up to date")
+            elif package_file.read_only:
+                logger.warning("Tag index is out of date")
+            else:
+                logger.warning("Tag index was out of date, rebuilding it")
+                package_file.write()
 
         # Check if all packages exist
         logger.debug("Checking each package")
-        package_list = self.get_package_list()
         all_packages_valid = True
-        for package_name in package_list:
-            package_path = package_list[package_name]
+        for package_name, package_file in self.select_packages():
+            package_path = package_file.packages[package_name]["path"]
             package_path_exists = path.exists(package_path)
             package_path_is_dir = path.isdir(package_path)
             if not package_path_exists:
@@ -32,5 +32,9 @@ class Help(Base):
         logger.debug("Displaying the docstring for the command")
         module = getattr(commands, called_command)
         module_commands = getmembers(module, isclass)
-        command = [command[1] for command in module_commands if command[0] != "Base"][0]
+        command = [
+            command[1]
+            for command in module_commands
+            if command[1].__module__ == module.__name__
+        ][0]
         print(command.__doc__)
@@ -1,7 +1,10 @@
 from ._base import Base
-from git import Repo
+from ._packagefile import PackageFile
+from datetime import datetime
+from git import Git, Repo
 from loguru import logger
 from os import getcwd, path
+from shutil import rmtree
 import http.client as httplib
 from ._updateprogress import UpdateProgress
 
@@ -14,16 +17,30 @@ class Install(Base):
     be used as the directory name. Otherwise, the package name is set to
     `username/repository`.
 
-    Usage: gitget install <package_url> [<package_name>] [global options]
+    Usage: gitget install <package_url> [<package_name>] [options] [global options]
+
+    Options:
+        --sparse=<path>  Only check out the given directory (cone mode), can be
+                         repeated to check out several directories
+        --tag=<tag>      Tag the package, can be repeated to add several tags
+        --ref=<ref>      Pin the package to a branch, tag or commit
+        --depth=<depth>  Only clone the given number of commits
 
     Examples:
         gitget install 'https://github.com/awesmubarak/gitget'
         gitget install 'https://github.com/awesmubarak/gitget' 'gitget-download'
+        gitget install 'https://github.com/awesmubarak/gitget' --sparse gitgetpm
+        gitget install 'https://github.com/awesmubarak/gitget' --tag tools --ref v2.3.0
     """
 
     def run(self):
-        package_list = self.get_package_list()
+        package_file = self.get_package_file()
+        package_list = package_file.packages
         package_url = self.options["<package_url>"]
+        sparse_paths = self.options["--sparse"]
+        tags = self.options["--tag"]
+        ref = self.options["--ref"]
+        depth = self.options["--depth"]
         directory_name = ""
 
         # sort out package name
@@ -76,18 +93,80 @@ class Install(Base):
             )
             exit(1)
 
+        # sort out the options to clone with, these are saved with the package
+        logger.debug("Deciding clone options")
+        clone_options = {}
+        if depth is not None:
+            try:
+                clone_options["depth"] = int(depth)
+            except ValueError:
+                logger.error(f"Depth is not a number: {depth}")
+                exit(1)
+        if sparse_paths:
+            clone_options["sparse"] = True
+
+        # branches and tags are cloned directly, so they work with `--depth`,
+        # other refs (commits) are checked out after cloning
+        checkout_ref = None
+        if ref is not None:
+            logger.debug("Checking if the ref is a branch or tag")
+            try:
+                ref_is_remote = bool(
+                    Git().ls_remote("--heads", "--tags", package_url, ref)
+                )
+            except:
+                logger.exception("Could not list the refs of the repository")
+                exit(1)
+            if not ref_is_remote:
+                checkout_ref = ref
+
         # clone repository
         logger.info(f"Cloning repository {package_name}")
         try:
-            Repo.clone_from(package_url, package_location, progress=UpdateProgress())
+            repo = Repo.clone_from(
+                package_url,
+                package_location,
+                progress=UpdateProgress(),
+                branch=None if checkout_ref else ref,
+                **clone_options,
+            )
         except:
             logger.exception("Could not clone the repository")
+            rmtree(package_location, ignore_errors=True)
             exit(1)
         UpdateProgress.clear_line()
         logger.debug("Clone successfull")
 
+        # restrict the working tree to the sparse paths
+        if sparse_paths:
+            logger.info(f"Checking out sparse paths: {', '.join(sparse_paths)}")
+            try:
+                self.apply_sparse_checkout(package_location, sparse_paths)
+            except:
+                logger.exception("Could not set the sparse paths")
+                rmtree(package_location, ignore_errors=True)
+                exit(1)
+
+        # check out the pinned commit
+        if checkout_ref is not None:
+            logger.info(f"Checking out {checkout_ref}")
+            try:
+                repo.git.checkout(checkout_ref)
+            except:
+                logger.exception(f"Could not check out {checkout_ref}")
+                rmtree(package_location, ignore_errors=True)
+                exit(1)
+
         # add package to package list
         logger.debug("Adding package to package list")
-        package_list[package_name] = package_location
-        self.write_package_list(package_list)
+        package_list[package_name] = PackageFile.new_package_info(
+            path=package_location,
+            url=package_url,
+            tags=tags,
+            ref=ref,
+            clone_options=clone_options,
+            sparse=sparse_paths,
+            updated=datetime.now().isoformat(timespec="seconds"),
+        )
+        package_file.write()
         logger.info("Saved package information")
@@ -8,29 +8,53 @@ class List(Base):
 
     Lists all packages and install locations.
 
-    Usage: gitget list [global options]
+    Usage: gitget list [options] [global options]
+
+    Options:
+        --tag=<tag>             Only list packages with the tag, can be repeated
+                                to list packages with any of the tags
+        --match=<glob>          Only list packages with names matching the glob
+        --changed-since=<date>  Only list packages changed since the date
+        --scope=<scope>         Package files to use: project, user, system or
+                                all (the closest package file by default)
 
     Examples:
         gitget list
+        gitget list --tag tools
+        gitget list --scope all
     """
 
     def run(self):
 
-        package_list = self.get_package_list()
+        selected_packages = self.select_packages()
 
         # print message if no content in package List
         logger.debug("Checking if package list is empty")
-        if not package_list:
-            logger.info("Package list is empty")
+        if not selected_packages:
+            logger.info("No packages to list")
             return 0
 
         # create the table, trimming each section
         logger.debug("Creating table for printing")
         table = []
-        for package_name, package_location in package_list.items():
-            table.append([package_name, package_location])
+        for package_name, package_file in selected_packages:
+            package_info = package_file.packages[package_name]
+            tags = ", ".join(package_info["tags"])
+            sparse_paths = ", ".join(package_info["sparse"])
+            table.append(
+                [
+                    package_name,
+                    package_info["path"],
+                    tags,
+                    sparse_paths,
+                    package_file.scope,
+                ]
+            )
 
         logger.debug("Printing table")
-        number_str = f"{len(package_list)} packages:"
-        table = tabulate(table, headers=["Package name", "Location"])
+        number_str = f"{len(selected_packages)} packages:"
+        table = tabulate(
+            table,
+            headers=["Package name", "Location", "Tags", "Sparse paths", "Scope"],
+        )
         logger.info(f"{number_str}\n\n{table}\n")
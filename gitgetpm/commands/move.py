@@ -17,7 +17,6 @@ class Move(Base):
     """
 
     def run(self):
-        package_list = self.get_package_list()
         package_name = self.options["<package_name>"]
         location = self.options["<location>"]
 
@@ -32,24 +31,21 @@ class Move(Base):
             logger.error("Location to move package to is not valid")
 
         # verify that the package exists in the package list
-        logger.debug("Checking if package in package list")
-        try:
-            _ = package_list[package_name]
-        except KeyError as e:
-            logger.error(f"Package name is not valid: {package_name}")
-            exit(1)
+        package_file, package_info = self.get_package(package_name, writable=True)
+        package_location = package_info["path"]
 
         # move the package to the location
         logger.debug("Attempting to move package")
         try:
-            mmove(package_list[package_name], location)
+            # moves into the location if it's a directory, otherwise renames
+            new_location = path.abspath(mmove(package_location, location))
             logger.info("Moved package")
         except:
             logger.error("Could not move the package")
             exit(1)
 
-        # update package list
+        # update package list, keeping the rest of the package information
         logger.debug("Updating package list")
-        package_list[package_name] = location
-        self.write_package_list(package_list)
+        package_info["path"] = new_location
+        package_file.write()
         logger.info("Saved package information")
@@ -22,18 +22,12 @@ class Remove(Base):
     """
 
     def run(self):
-        package_list = self.get_package_list()
         package_name = self.options["<package_name>"]
         soft_remove = self.options["--soft"]
 
         # check if package exists
-        logger.debug("Checking if package in package list")
-        if not package_name in package_list:
-            logger.error("Package name not in package list")
-            exit(1)
-        else:
-            logger.debug("Package in package list")
-        package_location = package_list[package_name]
+        package_file, package_info = self.get_package(package_name, writable=True)
+        package_location = package_info["path"]
 
         # conifrm deleting files if asked to do so
         if not soft_remove:
@@ -57,8 +51,8 @@ class Remove(Base):
 
         # remove package from package list
         logger.debug("Updating package list")
-        package_list.pop(package_name, None)
-        self.write_package_list(package_list)
+        package_file.packages.pop(package_name, None)
+        package_file.write()
         logger.info("Saved package information")
 
         # delete the files
@@ -1,29 +1,40 @@
-from ._base import Base
+from ._base import Base, PACKAGE_FILE_NAME
+from ._packagefile import PackageFile
 from loguru import logger
-from os import path
+from os import getcwd, path
 
 
 class Setup(Base):
     """Setup.
 
     Creates the files gitget needs to function. Only `.gitget.yaml` is needed in
-    the home directory.
+    the home directory. A project can have its own `.gitget.yaml`, which is
+    used instead when running gitget from inside the project.
 
-    Usage: gitget setup [global options]
+    Usage: gitget setup [options] [global options]
+
+    Options:
+        --project  Create the package file in the current directory
 
     Examples:
         gitget setup
+        gitget setup --project
     """
 
     def run(self):
-        package_list_path = self.get_package_list_filepath()
-        package_file_status = self.check_package_list_file(
+        if self.options.get("--project"):
+            package_list_path = path.join(getcwd(), PACKAGE_FILE_NAME)
+            location = "current directory"
+        else:
+            package_list_path = self.get_user_package_list_filepath()
+            location = "home directory"
+        package_file_status = PackageFile.check_package_list_file(
             package_list_path=package_list_path
         )
 
         logger.debug("Verifying package file status")
         if package_file_status == 1:
-            logger.debug("Package file `.gitget.yaml` missing in home directory")
+            logger.debug(f"Package file `.gitget.yaml` missing in {location}")
         elif package_file_status == 2:
             logger.error(
                 "Package file `.gitget.yaml` is a directory, please manually remove"
@@ -37,4 +48,4 @@ class Setup(Base):
         logger.debug("Creating file")
         with open(package_list_path, "w") as file:
             file.write("")
-        logger.info("Created package file `gitget.yaml` in home directory")
+        logger.info(f"Created package file `gitget.yaml` in {location}")
@@ -0,0 +1,60 @@
+from ._base import Base
+from loguru import logger
+
+
+class Sparse(Base):
+    """Sparse.
+
+    Changes the sparse-checkout paths of an installed package in place,
+    without cloning it again. If no paths are given, the current sparse paths
+    are shown.
+
+    Usage: gitget sparse <package_name> [<sparse_path>...] [options] [global options]
+
+    Options:
+        --disable  Stop using sparse-checkout and check out the full tree
+
+    Examples:
+        gitget sparse awesmubarak_gitget
+        gitget sparse awesmubarak_gitget gitgetpm docs
+        gitget sparse awesmubarak_gitget --disable
+    """
+
+    def run(self):
+        package_name = self.options["<package_name>"]
+        sparse_paths = self.options["<sparse_path>"]
+        disable = self.options["--disable"]
+
+        # check if package exists
+        package_file, package_info = self.get_package(
+            package_name, writable=bool(sparse_paths or disable)
+        )
+        package_location = package_info["path"]
+
+        # only show the current sparse paths if nothing is changed
+        if not sparse_paths and not disable:
+            current_paths = package_info["sparse"]
+            if current_paths:
+                logger.info(f"Sparse paths: {', '.join(current_paths)}")
+            else:
+                logger.info("Package does not use sparse-checkout")
+            return 0
+
+        if sparse_paths and disable:
+            logger.error("Sparse paths can not be given with `--disable`")
+            exit(1)
+
+        # change the checked out paths
+        logger.debug("Attempting to change the sparse paths")
+        try:
+            self.apply_sparse_checkout(package_location, sparse_paths)
+        except:
+            logger.exception("Could not change the sparse paths")
+            exit(1)
+        logger.info("Changed sparse paths")
+
+        # update package list
+        logger.debug("Updating package list")
+        package_info["sparse"] = sparse_paths
+        package_file.write()
+        logger.info("Saved package information")
@@ -0,0 +1,54 @@
+from ._base import Base
+from loguru import logger
+
+
+class Tag(Base):
+    """Tag.
+
+    Adds tags to a package, so it can be selected with `--tag` by the commands
+    that work on many packages. If no tags are given, the current tags are
+    shown.
+
+    Usage: gitget tag <package_name> [<tag_name>...] [options] [global options]
+
+    Options:
+        --remove  Remove the tags from the package instead of adding them
+
+    Examples:
+        gitget tag awesmubarak_gitget
+        gitget tag awesmubarak_gitget tools python
+        gitget tag awesmubarak_gitget python --remove
+    """
+
+    def run(self):
+        package_name = self.options["<package_name>"]
+        tag_names = self.options["<tag_name>"]
+        remove = self.options["--remove"]
+
+        # check if package exists
+        package_file, package_info = self.get_package(
+            package_name, writable=bool(tag_names)
+        )
+
+        # only show the current tags if nothing is changed
+        if not tag_names:
+            if package_info["tags"]:
+                logger.info(f"Tags: {', '.join(package_info['tags'])}")
+            else:
+                logger.info("Package has no tags")
+            return 0
+
+        # change the tags
+        logger.debug("Changing tags")
+        if remove:
+            tags = [tag for tag in package_info["tags"] if tag not in tag_names]
+        else:
+            tags = package_info["tags"] + [
+                tag for tag in tag_names if tag not in package_info["tags"]
+            ]
+        package_info["tags"] = tags
+
+        # update package list, which also updates the tag index
+        logger.debug("Updating package list")
+        package_file.write()
+        logger.info("Saved package information")
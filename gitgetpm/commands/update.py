@@ -1,4 +1,5 @@
 from ._base import Base
+from datetime import datetime
 from loguru import logger
 from os import getcwd
 import git
@@ -9,16 +10,30 @@ class Update(Base):
     """Update.
 
     Runs `git-pull` on all packages in the package list to update them.
+    Packages installed with sparse paths only update those paths, and pinned
+    packages are kept on their ref.
 
-    Usage: gitget update [global options]
+    Usage: gitget update [options] [global options]
+
+    Options:
+        --tag=<tag>             Only update packages with the tag, can be
+                                repeated to update packages with any of the tags
+        --match=<glob>          Only update packages with names matching the glob
+        --changed-since=<date>  Only update packages changed since the date
+        --scope=<scope>         Package files to use: project, user, system or
+                                all (the closest package file by default)
 
     Examples:
         gitget update
+        gitget update --tag tools
+        gitget update --match 'awesmubarak_*'
+        gitget update --changed-since 2020-01-01
+        gitget update --scope all
     """
 
     def run(self):
-        package_list = self.get_package_list()
-        number_of_packages = len(package_list)
+        selected_packages = self.select_packages()
+        number_of_packages = len(selected_packages)
 
         logger.debug("Making sure there are some packages to update")
         if number_of_packages == 0:
@@ -26,16 +41,50 @@ class Update(Base):
             exit(0)
 
         logger.debug("Going through each package")
-        for package_number, package_name in enumerate(package_list):
-            package_path = package_list[package_name]
+        changed_package_files = []
+        for package_number, (package_name, package_file) in enumerate(
+            selected_packages
+        ):
+            package_info = package_file.packages[package_name]
+            package_path = package_info["path"]
+            sparse_paths = package_info["sparse"]
+            ref = package_info["ref"]
 
             logger.debug(f"Attempting to update {package_name}")
             try:
                 repo = git.Repo(package_path)
                 origins = repo.remotes.origin
+                previous_commit = repo.head.commit.hexsha
                 progress = f"[{package_number+1}/{number_of_packages}]"
                 logger.info(f"Updating {package_name}  {progress}")
-                origins.pull(progress=UpdateProgress())
+                if sparse_paths:
+                    self.apply_sparse_checkout(package_path, sparse_paths)
+                if ref is not None:
+                    # pinned to a tag or commit, only pull if it's a branch
+                    origins.fetch(progress=UpdateProgress())
+                    repo.git.checkout(ref)
+                    if not repo.head.is_detached:
+                        origins.pull(progress=UpdateProgress())
+                else:
+                    origins.pull(progress=UpdateProgress())
                 logger.debug("Package updated successfully")
             except Exception:
                 logger.exception(f"Package {package_name} could not be updated")
+                continue
+
+            # remember when the package last changed, read only package files
+            # can't save this
+            if repo.head.commit.hexsha != previous_commit:
+                logger.debug("Package has changed")
+                package_info["updated"] = datetime.now().isoformat(timespec="seconds")
+                if (
+                    not package_file.read_only
+                    and package_file not in changed_package_files
+                ):
+                    changed_package_files.append(package_file)
+
+        # save each package file once
+        for package_file in changed_package_files:
+            package_file.write()
+        if changed_package_files:
+            logger.info("Saved package information")
@@ -0,0 +1,198 @@
+"""Tests for `gitget bundle`, exporting packages on one machine and importing
+them on another."""
+
+from gitgetpm import cli
+from gitgetpm.commands.bundle import Bundle
+from os import listdir, path
+import git
+import pytest
+import sys
+import yaml
+
+
+def run_gitget(monkeypatch, home, *arguments):
+    """Runs gitget as if from the command line, with `home` as the home
+    directory and the current directory."""
+    monkeypatch.setenv("HOME", str(home))
+    monkeypatch.chdir(home)
+    monkeypatch.setattr(sys, "argv", ["gitget", *arguments])
+    cli.main()
+
+
+def read_package_file(home):
+    with open(home / ".gitget.yaml") as file:
+        return yaml.safe_load(file)
+
+
+def write_package_file(home, packages):
+    with open(home / ".gitget.yaml", "w") as file:
+        yaml.dump({"version": 2, "packages": packages}, file)
+
+
+def add_commit(repo, filename, content):
+    with open(path.join(repo.working_tree_dir, filename), "w") as file:
+        file.write(content)
+    repo.index.add([filename])
+    return repo.index.commit(f"Change {filename}").hexsha
+
+
+@pytest.fixture(autouse=True)
+def git_identity(monkeypatch):
+    for variable in ("GIT_AUTHOR", "GIT_COMMITTER"):
+        monkeypatch.setenv(f"{variable}_NAME", "gitget")
+        monkeypatch.setenv(f"{variable}_EMAIL", "gitget@example.com")
+
+
+@pytest.fixture
+def origin(tmp_path):
+    """A repository to install packages from."""
+    repo = git.Repo.init(tmp_path / "origin", initial_branch="main")
+    (tmp_path / "origin" / "docs").mkdir()
+    (tmp_path / "origin" / "src").mkdir()
+    add_commit(repo, "README.md", "readme")
+    add_commit(repo, "docs/index.md", "docs")
+    add_commit(repo, "src/main.py", "main")
+    return repo
+
+
+@pytest.fixture
+def source(tmp_path, origin):
+    """The home directory of the machine with network access, with the origin
+    installed as a package."""
+    home = tmp_path / "source"
+    home.mkdir()
+    repo = git.Repo.clone_from(origin.working_tree_dir, home / "tool")
+    write_package_file(
+        home, {"tool": {"path": repo.working_tree_dir, "tags": ["tools"]}}
+    )
+    return home
+
+
+@pytest.fixture
+def target(tmp_path):
+    """The home directory of the machine without network access."""
+    home = tmp_path / "target"
+    home.mkdir()
+    write_package_file(home, {})
+    return home
+
+
+def test_export_and_import(tmp_path, monkeypatch, source, target):
+    bundles = tmp_path / "bundles"
+    run_gitget(monkeypatch, source, "bundle", "export", str(bundles))
+    run_gitget(monkeypatch, target, "bundle", "import", str(bundles))
+
+    package_info = read_package_file(target)["packages"]["tool"]
+    assert package_info["path"] == str(target / "tool")
+    assert package_info["tags"] == ["tools"]
+    assert read_package_file(target)["imported"] == listdir(bundles)
+
+    source_repo = git.Repo(source / "tool")
+    target_repo = git.Repo(target / "tool")
+    assert target_repo.head.commit == source_repo.head.commit
+    assert (target / "tool" / "src" / "main.py").is_file()
+    assert not target_repo.is_dirty()
+
+
+def test_export_and_import_changes(tmp_path, monkeypatch, source, target):
+    bundles = tmp_path / "bundles"
+    run_gitget(monkeypatch, source, "bundle", "export", str(bundles))
+    run_gitget(monkeypatch, target, "bundle", "import", str(bundles))
+
+    # new commits, a tag on one of them, and a branch at an exported commit
+    source_repo = git.Repo(source / "tool")
+    exported_commit = source_repo.head.commit.hexsha
+    add_commit(source_repo, "src/main.py", "new main")
+    source_repo.create_tag("v1")
+    source_repo.create_head("feature", exported_commit)
+    add_commit(source_repo, "src/extra.py", "extra")
+    run_gitget(monkeypatch, source, "bundle", "export", str(bundles))
+    run_gitget(monkeypatch, target, "bundle", "import", str(bundles))
+
+    assert len(listdir(bundles)) == 2
+    manifest_path = bundles / sorted(listdir(bundles))[1] / "manifest.yaml"
+    with open(manifest_path) as file:
+        manifest_entry = yaml.safe_load(file)["packages"]["tool"]
+    # the new branch is at an exported commit, so only the commits from the
+    # branch on are exported again
+    exported_parent = source_repo.commit(exported_commit).parents[0].hexsha
+    assert manifest_entry["prerequisites"] == [exported_parent]
+
+    target_repo = git.Repo(target / "tool")
+    assert target_repo.head.commit == source_repo.head.commit
+    assert target_repo.tags["v1"].commit == source_repo.tags["v1"].commit
+    assert target_repo.refs["origin/feature"].commit.hexsha == exported_commit
+
+
+def test_export_refs_at_exported_commits(tmp_path, monkeypatch, source, target):
+    bundles = tmp_path / "bundles"
+    run_gitget(monkeypatch, source, "bundle", "export", str(bundles))
+    run_gitget(monkeypatch, target, "bundle", "import", str(bundles))
+
+    # only refs are added, every commit was already exported
+    source_repo = git.Repo(source / "tool")
+    source_repo.create_tag("v1", message="First release")
+    source_repo.create_head("feature", "HEAD~1")
+    run_gitget(monkeypatch, source, "bundle", "export", str(bundles))
+    run_gitget(monkeypatch, target, "bundle", "import", str(bundles))
+
+    assert len(listdir(bundles)) == 2
+    target_repo = git.Repo(target / "tool")
+    assert target_repo.tags["v1"].tag.message == "First release"
+    assert target_repo.refs["origin/feature"].commit == source_repo.heads.feature.commit
+
+
+def test_export_skips_unchanged_packages(tmp_path, monkeypatch, source):
+    bundles = tmp_path / "bundles"
+    run_gitget(monkeypatch, source, "bundle", "export", str(bundles))
+    run_gitget(monkeypatch, source, "bundle", "export", str(bundles))
+    assert len(listdir(bundles)) == 1
+
+    run_gitget(monkeypatch, source, "bundle", "export", str(bundles), "--full")
+    assert len(listdir(bundles)) == 2
+
+
+def test_import_skips_imported_exports(tmp_path, monkeypatch, source, target):
+    bundles = tmp_path / "bundles"
+    run_gitget(monkeypatch, source, "bundle", "export", str(bundles))
+    run_gitget(monkeypatch, target, "bundle", "import", str(bundles))
+
+    def import_export(*args, **kwargs):
+        pytest.fail("An imported export was imported again")
+
+    monkeypatch.setattr(Bundle, "import_export", import_export)
+    run_gitget(monkeypatch, target, "bundle", "import", str(bundles))
+
+
+def test_import_sparse_package(tmp_path, monkeypatch, source, target):
+    package_file = read_package_file(source)
+    package_file["packages"]["tool"]["sparse"] = ["src"]
+    write_package_file(source, package_file["packages"])
+
+    bundles = tmp_path / "bundles"
+    run_gitget(monkeypatch, source, "bundle", "export", str(bundles))
+    run_gitget(monkeypatch, target, "bundle", "import", str(bundles))
+
+    assert read_package_file(target)["packages"]["tool"]["sparse"] == ["src"]
+    assert (target / "tool" / "README.md").is_file()
+    assert (target / "tool" / "src" / "main.py").is_file()
+    assert not (target / "tool" / "docs").exists()
+
+
+def test_export_refuses_shallow_packages(tmp_path, monkeypatch, origin, source):
+    shallow_repo = git.Repo.clone_from(
+        f"file://{origin.working_tree_dir}", source / "shallow", depth=1
+    )
+    package_file = read_package_file(source)
+    package_file["packages"]["shallow"] = {"path": shallow_repo.working_tree_dir}
+    write_package_file(source, package_file["packages"])
+
+    bundles = tmp_path / "bundles"
+    run_gitget(monkeypatch, source, "bundle", "export", str(bundles))
+
+    [export_name] = listdir(bundles)
+    with open(bundles / export_name / "manifest.yaml") as file:
+        assert list(yaml.safe_load(file)["packages"]) == ["tool"]
+    packages = read_package_file(source)["packages"]
+    assert packages["tool"]["exported"]
+    assert packages["shallow"]["exported"] == {}